@@ -3,10 +3,285 @@ import pandas as pd
 
 from scipy import stats
 
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from numba import njit, prange
+    from numba.typed import List
+    NUMBA_AVAILABLE = True
+
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """Stand-in decorator so the kernels below still import without numba. They only get called when numba is installed."""
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+
+        return lambda func: func
+
+    prange = range
+    List = list
+
+# below this many games, starting threads or processes costs more than it saves
+PARALLEL_MIN_GAMES = 1000
+
+# the parallel game kernel splits games into this many blocks, each drawing from its own Generator.
+# Fixed rather than tied to the thread count, so a seed gives the same games on any machine
+GAME_STREAMS = 64
+
+# at or above this many plays, one sized draw beats summing scalar draws
+SERIES_VEC_MIN_PLAYS = 2
+
+# play types are stored as integers in drive data
+PLAY_TYPES = ('run_play', 'punt', 'field_goal')
+RUN_PLAY, PUNT, FIELD_GOAL = range(len(PLAY_TYPES))
+
+# columns of the team parameter matrix read by the compiled game kernel, named after the FootballTeam attributes
+TEAM_PARAMS = ('min_yards', 'exp_yards', 'max_yards', 'punt_distance', 'punt_stdv', 'fourth_down_position_thresh',
+               'fourth_down_yard_thresh', 'go_for_two', 'two_point_conversion_rate', 'need_touchdown', 'need_score')
+(MIN_YARDS, EXP_YARDS, MAX_YARDS, PUNT_DISTANCE, PUNT_STDV, FOURTH_DOWN_POSITION_THRESH, FOURTH_DOWN_YARD_THRESH,
+ GO_FOR_TWO, TWO_POINT_CONVERSION_RATE, NEED_TOUCHDOWN, NEED_SCORE) = range(len(TEAM_PARAMS))
+
+# one row of drive data per play
+PLAY_DTYPE = np.dtype([('field_position', 'f4'),
+                       ('down', 'i1'),
+                       ('yards_to_first_down', 'f4'),
+                       ('play_type', 'i1'),
+                       ('yards_gained', 'f4'),
+                       ('points_from_play', 'i1'),
+                       ('punt_distance', 'f4'),
+                       ('opponent_position', 'f4'),
+                       ('made_kick', '?')])
+
+def game_dtype(name_length: int = 32) -> np.dtype:
+    """One row of summary data per game, matching FootballGame.game_data. Team names are stored as strings of up to name_length characters"""
+    return np.dtype([('winner', f'U{name_length}'),
+                     ('loser', f'U{name_length}'),
+                     ('winner_score', 'i1'),
+                     ('loser_score', 'i1'),
+                     ('winner_had_ball_first', '?'),
+                     ('winning_team_number_of_drives', 'i2'),
+                     ('losing_team_number_of_drives', 'i2'),
+                     ('total_yards_winning_team', 'f4'),
+                     ('total_yards_losing_team', 'f4')])
+
+GAME_FIELDS = game_dtype().names
+
+def plays_to_df(plays: np.ndarray) -> pd.DataFrame:
+    """Converts an array of PLAY_DTYPE rows into a DataFrame with readable play types"""
+    df = pd.DataFrame.from_records(plays)
+    df['play_type'] = np.array(PLAY_TYPES)[plays['play_type']]
+
+    return df
+
+def next_drive_start(play_type, points_from_play, field_position, yards_gained, opponent_position, empty_drive=False):
+    """Where the opponent starts after each drive, for arrays of last plays. Used by simulate_games_vectorized.
+    Scores lead to a kickoff, punts use the punt's opponent position, and anything else is a turnover at the spot of the ball.
+    A drive that ran no plays turns the ball over where it started, which is field_position for those lanes.
+    The single drive versions in FootballTeam.determine_opponent_position and _simulate_game_kernel are written 
+    with branches, which is faster for one value. Keep all three in step.
+    """
+    return np.where(empty_drive, 100 - field_position,
+                    np.where(points_from_play > 0, 25, # no variation on kickoffs for now
+                             np.where(play_type == PUNT, opponent_position, 
+                                      100 - (field_position + yards_gained)))) # turnover on downs. Flip the field from the last play
+
+@njit(cache=True)
+def max_drive_plays(starting_position: int | float) -> int:
+    """Upper bound on the number of plays in a drive. Every series gains at least 10 yards, so a drive has at most one
+    series per 10 yards to the endzone, plus one spare for rounding.
+    """
+    return 4 * (max(int(np.ceil((100 - starting_position) / 10)), 0) + 1)
+
+@njit(cache=True)
+def _simulate_drive_kernel(rng, min_yards, exp_yards, max_yards, punt_distance, punt_stdv,
+                           fourth_down_position_thresh, fourth_down_yard_thresh,
+                           go_for_two, two_point_conversion_rate, need_touchdown, need_score, fg_lut,
+                           starting_position, out_field_position, out_down, out_yards_to_first_down,
+                           out_play_type, out_yards_gained, out_points_from_play,
+                           out_punt_distance, out_opponent_position, out_made_kick):
+    """Compiled version of the FootballTeam.simulate_drive play loop. Writes one row per play into the output arrays.
+    Returns the number of plays and the field position, down, and yards to go after the last play.
+    fg_lut is FootballTeam._FG_LUT, so field goal odds match the python engine.
+    rng is a np.random.Generator. Draws advance its state, same as drawing from it in python.
+    """
+    field_position = starting_position
+    down = 0
+    yards_to_first_down = 10.0
+    n_plays = 0
+
+    while down <= 3 and field_position < 100 and n_plays < out_play_type.size:
+        out_field_position[n_plays] = field_position
+        out_down[n_plays] = down
+        out_yards_to_first_down[n_plays] = yards_to_first_down
+
+        # always run a play if it's not 4th down
+        play_type = RUN_PLAY
+        kick_probability = 0.0
+
+        if down == 3 and not (need_touchdown or (field_position > fourth_down_position_thresh and yards_to_first_down < fourth_down_yard_thresh)):
+            # same lookup as FootballTeam.get_field_goal_probability
+            if 0 <= field_position <= 100:
+                kick_probability = fg_lut[int(field_position)]
+
+            if kick_probability > .55:
+                play_type = FIELD_GOAL
+
+            elif not need_score:
+                play_type = PUNT
+
+        points_from_play = 0
+
+        if play_type == RUN_PLAY:
+            play_result = rng.triangular(min_yards, exp_yards, max_yards)
+            field_position += play_result
+            down += 1
+
+            if field_position >= 100:
+                points_from_play = 6
+
+                if not go_for_two:
+                    points_from_play += 1
+
+                elif rng.uniform(0.0, 1.0) <= two_point_conversion_rate:
+                    points_from_play += 2
+
+            else:
+                yards_to_first_down -= play_result
+
+                if yards_to_first_down <= 0:
+                    down = 0
+                    yards_to_first_down = 10.0
+
+            out_yards_gained[n_plays] = play_result
+
+        elif play_type == PUNT:
+            punt_result = rng.normal(punt_distance, punt_stdv)
+            punt_landing_spot = punt_result + field_position
+
+            out_punt_distance[n_plays] = punt_result
+            out_opponent_position[n_plays] = 100 - punt_landing_spot if punt_landing_spot <= 100 else 25
+            down += 1
+
+        else:
+            made_kick = rng.uniform(0.0, 1.0) <= kick_probability
+
+            if made_kick:
+                points_from_play = 3
+
+            out_yards_gained[n_plays] = -5
+            out_made_kick[n_plays] = made_kick
+            down += 1
+
+        out_play_type[n_plays] = play_type
+        out_points_from_play[n_plays] = points_from_play
+        n_plays += 1
+
+    return n_plays, field_position, down, yards_to_first_down
+
+@njit(cache=True)
+def _drive_buffers(n_plays):
+    """Zeroed play arrays for _simulate_drive_kernel, in its argument order"""
+    return (np.zeros(n_plays), np.zeros(n_plays, dtype=np.int64), np.zeros(n_plays), np.zeros(n_plays, dtype=np.int64),
+            np.zeros(n_plays), np.zeros(n_plays, dtype=np.int64), np.zeros(n_plays), np.zeros(n_plays), 
+            np.zeros(n_plays, dtype=np.bool_))
+
+@njit(cache=True)
+def _simulate_game_kernel(rng, team_params, fg_lut, game, out_score, out_drives, out_yards):
+    """Compiled version of FootballGame.simulate_game. team_params has one row per team, ball first team first, 
+    with columns indexed by the TEAM_PARAMS constants. Results for the game go into 
+    column `game` of the (2, n_games) output arrays.
+    """
+    offense = 0
+    phase = 0 # 0 = team1 drive, 1 = team2 drive, 2 = sudden death
+    starting_position = 25.0
+    need_touchdown = team_params[0, NEED_TOUCHDOWN] > 0
+    need_score = team_params[0, NEED_SCORE] > 0
+
+    (field_position, down, yards_to_first_down, play_type, yards_gained, points_from_play, 
+     punt_distance, opponent_position, made_kick) = _drive_buffers(max_drive_plays(starting_position))
+
+    while True:
+        # drives can start deep in a team's own end. Grow the buffers so a long drive is never cut short
+        if max_drive_plays(starting_position) > play_type.size:
+            (field_position, down, yards_to_first_down, play_type, yards_gained, points_from_play, 
+             punt_distance, opponent_position, made_kick) = _drive_buffers(max_drive_plays(starting_position))
+
+        p = team_params[offense]
+        n_plays, _, _, _ = _simulate_drive_kernel(rng, p[MIN_YARDS], p[EXP_YARDS], p[MAX_YARDS], p[PUNT_DISTANCE], p[PUNT_STDV], 
+                                                  p[FOURTH_DOWN_POSITION_THRESH], p[FOURTH_DOWN_YARD_THRESH], 
+                                                  p[GO_FOR_TWO] > 0, p[TWO_POINT_CONVERSION_RATE], need_touchdown, need_score, fg_lut, starting_position, 
+                                                  field_position, down, yards_to_first_down, play_type, yards_gained, 
+                                                  points_from_play, punt_distance, opponent_position, made_kick)
+
+        out_drives[offense, game] += 1
+        out_score[offense, game] += points_from_play[:n_plays].sum()
+        out_yards[offense, game] += yards_gained[:n_plays].sum()
+
+        # same rule as next_drive_start
+        last = n_plays - 1
+        if n_plays == 0: # drive started in the endzone, so the ball turns over where it is
+            starting_position = 100 - starting_position
+
+        elif points_from_play[last] > 0:
+            starting_position = 25.0
+
+        elif play_type[last] == PUNT:
+            starting_position = opponent_position[last]
+
+        else:
+            starting_position = 100 - (field_position[last] + yards_gained[last])
+
+        # punts don't write yards, so clear them for the next drive
+        yards_gained[:n_plays] = 0.0
+
+        if phase >= 1 and out_score[0, game] != out_score[1, game]:
+            break
+
+        # second team knows what it needs on its first drive. Nobody needs anything special in sudden death
+        if phase == 0:
+            need_touchdown = team_params[1, NEED_TOUCHDOWN] > 0 or out_score[0, game] == 7
+            need_score = team_params[1, NEED_SCORE] > 0 or out_score[0, game] == 3
+
+        else:
+            need_touchdown = False
+            need_score = False
+
+        phase = min(phase + 1, 2)
+        offense = 1 - offense
+
+@njit(parallel=True, cache=True)
+def _simulate_games_kernel(rngs, team_params, fg_lut, out_score, out_drives, out_yards):
+    """Runs _simulate_game_kernel for every game across threads. Games are split into one contiguous block per 
+    Generator in rngs, and each block is played in order from its own Generator, so results don't depend on 
+    how blocks are split between threads.
+    """
+    n_games = out_score.shape[1]
+    n_blocks = len(rngs)
+
+    for block in prange(n_blocks):
+        rng = rngs[np.int64(block)]
+
+        for game in range(block * n_games // n_blocks, (block + 1) * n_games // n_blocks):
+            _simulate_game_kernel(rng, team_params, fg_lut, game, out_score, out_drives, out_yards)
+
 class FootballTeam():
     """Object describing a football team for this simulation. 
     Downs will index from 0, so down=3 is fourth down. Think of it as "number of downs completed"
     """
+    # thousands of teams get made per simulation, so skip the per-instance __dict__
+    __slots__ = ('name', 'has_completed_a_posession', 'min_yards', 'exp_yards', 'max_yards', 'punt_distance', 'punt_stdv',
+                 'fourth_down_yard_thresh', 'fourth_down_position_thresh', 'two_point_conversion_rate', 'go_for_two',
+                 'need_touchdown', 'need_score', 'downs_completed', 'field_position', 'score', 'first_down_yards_needed',
+                 'had_ball_first', 'has_completed_a_possession', '_plays', '_n_plays', '_drive_starts', 'rng', '_buf_size',
+                 '_yard_buf', '_yard_idx', '_punt_buf', '_punt_idx', '_uniform_buf', '_uniform_idx')
+
+    # field goal probability by field position. Kick distance adds 17 yards for the endzone and holding distance
+    _kick_distance = (100 - np.arange(101)) + 17
+    _FG_LUT = np.select([_kick_distance <= 40, _kick_distance <= 50, _kick_distance <= 60], [0.90, 0.70, 0.60], default=0.0).astype(np.float32)
+    del _kick_distance
+
     def __init__(self, name: str, 
                  has_completed_a_posession:bool = False,
                  min_yards:int | float=-15, 
@@ -19,7 +294,8 @@ class FootballTeam():
                  two_point_conversion_rate: float = 0.5,
                  go_for_two: bool = False,
                  need_touchdown:bool=False,
-                 need_score:bool=False):
+                 need_score:bool=False,
+                 seed: int | np.random.Generator = None):
 
         self.name = name
         self.has_completed_a_posession = has_completed_a_posession
@@ -41,7 +317,21 @@ class FootballTeam():
         self.first_down_yards_needed: int | float = 10,
         self.had_ball_first: bool = None
         self.has_completed_a_possession = False
-        self.drive_data = []
+
+        # every play the team runs goes into one growing buffer. _drive_starts marks where each drive begins
+        self._plays = np.zeros(64, PLAY_DTYPE)
+        self._n_plays = 0
+        self._drive_starts = []
+
+        # random draws are generated in batches and handed out one at a time
+        self.rng = np.random.default_rng(seed)
+        self._buf_size = 64
+        self._yard_buf: np.ndarray = None
+        self._yard_idx = self._buf_size
+        self._punt_buf: np.ndarray = None
+        self._punt_idx = self._buf_size
+        self._uniform_buf: np.ndarray = None
+        self._uniform_idx = self._buf_size
 
     def update_score(self, score_value:int):
         self.score += score_value
@@ -81,8 +371,22 @@ class FootballTeam():
     def set_had_ball_first(self, value: bool):
         self.had_ball_first = value
 
-    def update_drive_data(self, df: pd.DataFrame):
-        self.drive_data.append(df)
+    def reserve_plays(self, n_plays: int) -> np.ndarray:
+        """Returns room for n_plays more plays at the end of the play buffer, doubling the buffer if it's full"""
+        end = self._n_plays + n_plays
+
+        if end > self._plays.size:
+            # new rows need to start zeroed, since punts don't write yards gained and only field goals write made_kick
+            plays = np.zeros(max(2 * self._plays.size, end), PLAY_DTYPE)
+            plays[:self._n_plays] = self._plays[:self._n_plays]
+            self._plays = plays
+
+        return self._plays[self._n_plays:end]
+
+    def update_drive_data(self, n_plays: int):
+        """Records the next n_plays rows of the play buffer as a drive"""
+        self._drive_starts.append(self._n_plays)
+        self._n_plays += n_plays
 
     def set_two_point_conversion_rate(self, value: float):
         self.two_point_conversion_rate = value
@@ -90,31 +394,57 @@ class FootballTeam():
     def set_go_for_two(self, value: bool):
         self.go_for_two = value
 
-    def get_drive_data(self):
-        return self.drive_data
+    def get_drive_data(self) -> list[pd.DataFrame]:
+        return [plays_to_df(plays) for plays in np.split(self._plays[:self._n_plays], self._drive_starts[1:])]
+
+    def get_number_of_drives(self) -> int:
+        return len(self._drive_starts)
+
+    def get_total_yards(self) -> float:
+        return self._plays['yards_gained'][:self._n_plays].sum()
 
     def check_touchdown(self):
         return self.field_position >= 100
 
-    def get_play_conditions_dict(self, play_type:str = None) -> dict:
-        """Returns a boiler plate dict with game-state information on the start of any play"""
-        
-        result_dict = {'field_position': self.field_position,
-                       'down': self.downs_completed,
-                       'yards_to_first_down': self.first_down_yards_needed}
-
-        if play_type is not None:
-            result_dict['play_type'] = play_type
+    def set_play_conditions(self, play: np.void, play_type: int):
+        """Fills in game-state information on the start of any play"""
+        play['field_position'] = self.field_position
+        play['down'] = self.downs_completed
+        play['yards_to_first_down'] = self.first_down_yards_needed
+        play['play_type'] = play_type
 
-        return result_dict
+    def simulate_play_yards(self, n_plays: int=1) -> np.ndarray:
+        return self.rng.triangular(self.min_yards, self.exp_yards, self.max_yards, n_plays)
 
-    def simulate_play_yards(self, n_plays: int=1) -> float | np.ndarray:
-        play_result = np.random.triangular(self.min_yards, self.exp_yards, self.max_yards, n_plays)
+    def _next_play_yards(self) -> float:
+        if self._yard_idx >= self._buf_size:
+            self._yard_buf = self.simulate_play_yards(self._buf_size)
+            self._yard_idx = 0
 
-        if n_plays == 1:
-            play_result = play_result[0]
+        play_result = self._yard_buf[self._yard_idx]
+        self._yard_idx += 1
 
         return play_result
+
+    def _next_punt_distance(self) -> float:
+        if self._punt_idx >= self._buf_size:
+            self._punt_buf = self.rng.normal(self.punt_distance, self.punt_stdv, self._buf_size)
+            self._punt_idx = 0
+
+        punt_distance = self._punt_buf[self._punt_idx]
+        self._punt_idx += 1
+
+        return punt_distance
+
+    def _next_uniform(self) -> float:
+        if self._uniform_idx >= self._buf_size:
+            self._uniform_buf = self.rng.uniform(size=self._buf_size)
+            self._uniform_idx = 0
+
+        draw = self._uniform_buf[self._uniform_idx]
+        self._uniform_idx += 1
+
+        return draw
     
     def touch_down_conversion(self):
         points_from_play = 0
@@ -122,166 +452,222 @@ class FootballTeam():
         if not self.go_for_two:
             points_from_play += 1
 
-        elif np.random.uniform() <= self.two_point_conversion_rate:
+        elif self._next_uniform() <= self.two_point_conversion_rate:
             points_from_play += 2
 
         return points_from_play
     
-    def get_last_play(self):
-        return self.drive_data[-1].iloc[-1, :]
+    def last_drive_is_empty(self) -> bool:
+        """True if the last drive ran no plays, i.e. it started in the endzone"""
+        return self._drive_starts[-1] == self._n_plays
+
+    def get_last_play(self) -> np.void:
+        if self.last_drive_is_empty():
+            raise IndexError('last drive has no plays')
+
+        return self._plays[self._n_plays - 1]
         
-    def run_play(self, debug=False) -> dict:
-        """Simulates play with yardarge results by sampling from triangular distribution. Relies on user-supplied minimum likely yardage, most-liekly yardage, and max likely yardage."""
-        play_result = self.simulate_play_yards()
+    def run_play(self, play: np.void, debug=False) -> np.void:
+        """Simulates play with yardarge results by sampling from triangular distribution. Relies on user-supplied minimum likely yardage, most-liekly yardage, and max likely yardage.
+        Results are written into the play record.
+        """
+        play_result = self._next_play_yards()
 
-        result_dict = self.get_play_conditions_dict('run_play')
+        self.set_play_conditions(play, RUN_PLAY)
 
-        self.update_field_position(play_result)
+        # field position, touchdown, and first down updates are done inline. This runs on every play
+        field_position = self.field_position + play_result
+        self.field_position = field_position
         self.downs_completed += 1
         points_from_play = 0
         
-        if self.check_touchdown():
-            points_from_play = 6
-            points_from_play += self.touch_down_conversion()
-            self.update_score(points_from_play)
+        if field_position >= 100:
+            points_from_play = 6 + self.touch_down_conversion()
+            self.score += points_from_play
 
         else:
-            self.update_yards_to_firstdown(play_result)
+            yards_to_first_down = self.first_down_yards_needed - play_result
 
-        result_dict['yards_gained'] = play_result
-        result_dict['points_from_play'] = points_from_play
+            if yards_to_first_down <= 0:
+                self.downs_completed = 0
+                self.first_down_yards_needed = 10
+
+            else:
+                self.first_down_yards_needed = yards_to_first_down
+
+        play['yards_gained'] = play_result
+        play['points_from_play'] = points_from_play
         
-        return result_dict
+        return play
     
-    def punt(self) -> dict:
+    def punt(self, play: np.void) -> np.void:
         """Simulates a punt with normal distibution. Google search shows average punt distance is ~45 yards with a stdev of ~4 yards. 
         
         Does not account for runbacks.
         """
-        punt_distance = np.random.normal(self.punt_distance, self.punt_stdv)
+        punt_distance = self._next_punt_distance()
         punt_landing_spot = punt_distance + self.field_position
         
         # account for touchback
         opponent_position = 100 - punt_landing_spot if punt_landing_spot <= 100 else 25
 
-        result_dict = self.get_play_conditions_dict('punt')
-        result_dict['punt_distance'] = punt_distance
-        result_dict['opponent_position'] = opponent_position
-        result_dict['points_from_play'] = 0
+        self.set_play_conditions(play, PUNT)
+        play['punt_distance'] = punt_distance
+        play['opponent_position'] = opponent_position
+        play['points_from_play'] = 0
 
         self.downs_completed += 1
 
-        return result_dict
+        return play
             
-    def kick_field_goal(self) -> dict:
-        """Simulates field goal success"""
+    def kick_field_goal(self, play: np.void, kick_probability: float = None) -> np.void:
+        """Simulates field goal success. Pass kick_probability if it's already been looked up for this play"""
+        if kick_probability is None:
+            kick_probability = self.get_field_goal_probability()
+
         # simulate kick
-        kick_attempt = np.random.uniform()
+        kick_attempt = self._next_uniform()
+        made_kick = kick_attempt <= kick_probability
 
         points_from_play = 0
 
-        if kick_attempt <= self.get_field_goal_probability():
+        if made_kick:
             points_from_play = 3
             self.update_score(points_from_play)
 
-        result_dict = self.get_play_conditions_dict('field_goal')
-        result_dict['yards_gained'] = -5 # accounts for hold distance in case field goal is missed
-        result_dict['made_kick'] = kick_attempt <= self.get_field_goal_probability()
-        result_dict['points_from_play'] = points_from_play
+        self.set_play_conditions(play, FIELD_GOAL)
+        play['yards_gained'] = -5 # accounts for hold distance in case field goal is missed
+        play['made_kick'] = made_kick
+        play['points_from_play'] = points_from_play
 
         self.downs_completed += 1
 
-        return result_dict
+        return play
 
     def get_field_goal_probability(self) -> float:
         """Define short, medium, and long ranges for field goal
         Hard coded for now, but we can adapt this later to take user inputs.
+        Probabilities are looked up from _FG_LUT. The ranges all break on whole yards, so truncating the field position is exact.
         """
-
-        yards_to_endzone = 100 - self.field_position
-        additional_kick_yards = 17 # accounts for endzone length and holdign distance from line of scrimmage
-        kick_distance = yards_to_endzone + additional_kick_yards
-
-        # baseline kick probability will decrease based on distance
         # TODO: modify to accept user-supplied function determining kick probability
-        if kick_distance <= 40:
-            kick_probability = 0.90
-            
-        elif kick_distance <= 50:
-            kick_probability = 0.70
-            
-        elif kick_distance  <= 60:
-            kick_probability = 0.60
-            
-        else:
-            kick_probability = 0
+        if 0 <= self.field_position <= 100:
+            return self._FG_LUT[int(self.field_position)]
 
-        return kick_probability
+        return 0.0
 
     def meets_fouth_down_criteria(self):
         return self.field_position > self.fourth_down_position_thresh and self.first_down_yards_needed < self.fourth_down_yard_thresh
         
-    def fourth_down_decision(self):
+    def fourth_down_decision(self, play: np.void) -> np.void:
         if self.need_touchdown or self.meets_fouth_down_criteria():
-            return self.run_play()
-        
-        elif self.get_field_goal_probability() > .55:
-            return self.kick_field_goal()
+            return self.run_play(play)
+
+        kick_probability = self.get_field_goal_probability()
+
+        if kick_probability > .55:
+            return self.kick_field_goal(play, kick_probability)
         
         # need to go for it on 4th down if you need a score but aren't in FG range
-        elif self.need_score:
-            return self.run_play()
+        if self.need_score:
+            return self.run_play(play)
 
-        else:
-            return self.punt()
+        return self.punt(play)
 
     def simulate_drive(self, starting_position: int | float=25, debug=False) -> pd.DataFrame:
+        # the compiled kernel can't print plays, so debugging goes through the python loop
+        if NUMBA_AVAILABLE and not debug:
+            return self._simulate_drive_jit(starting_position)
+
         self.set_field_position(starting_position)
         self.reset_series()
 
-        plays = []
+        plays = self.reserve_plays(max_drive_plays(starting_position))
+        n_plays = 0
 
-        while self.downs_completed <= 3 and self.field_position < 100:
-            # always run a play if it's not 4th down
-            if self.downs_completed <= 2:
-                result = self.run_play()
+        # each pass of the outer loop is one series of at most 4 downs. A first down breaks out into a new series
+        while self.field_position < 100:
+            for down in range(4):
+                play = plays[n_plays]
 
-            else:
-                result = self.fourth_down_decision()
+                # always run a play if it's not 4th down
+                if down <= 2:
+                    self.run_play(play)
+
+                else:
+                    self.fourth_down_decision(play)
+
+                if debug:
+                    print(f'Play Result: {play}')
+                    
+                n_plays += 1
+
+                if self.downs_completed == 0 or self.field_position >= 100:
+                    break
+
+            # turnover on downs, punt, or field goal
+            if self.downs_completed > 3:
+                break
+
+        self.set_has_completed_possession(True)
+        self.update_drive_data(n_plays)
+
+        return self
+
+    def _simulate_drive_jit(self, starting_position: int | float=25):
+        """Same as simulate_drive, but the play loop runs in _simulate_drive_kernel"""
+        plays = self.reserve_plays(max_drive_plays(starting_position))
 
-            if debug:
-                print(f'Play Result: {result}')
-                
-            plays.append(result)
+        n_plays, self.field_position, self.downs_completed, self.first_down_yards_needed = _simulate_drive_kernel(
+            self.rng, float(self.min_yards), float(self.exp_yards), float(self.max_yards),
+            float(self.punt_distance), float(self.punt_stdv),
+            float(self.fourth_down_position_thresh), float(self.fourth_down_yard_thresh),
+            bool(self.go_for_two), float(self.two_point_conversion_rate), bool(self.need_touchdown), bool(self.need_score),
+            self._FG_LUT, float(starting_position), plays['field_position'], plays['down'], plays['yards_to_first_down'],
+            plays['play_type'], plays['yards_gained'], plays['points_from_play'],
+            plays['punt_distance'], plays['opponent_position'], plays['made_kick'])
 
+        self.update_score(int(plays['points_from_play'][:n_plays].sum()))
         self.set_has_completed_possession(True)
-        df = pd.DataFrame(plays)
-        self.update_drive_data(df)
+        self.update_drive_data(n_plays)
 
         return self
 
     def simulate_series(self, n_plays=3) -> float:
         """Simulates 3 plays. Can be used to simulate first down probability for a series"""
-        series_yardage = self.simulate_play_yards(n_plays=n_plays)
+        if n_plays < SERIES_VEC_MIN_PLAYS:
+            return self.simulate_series_scalar(n_plays)
+
+        return self.simulate_series_vec(n_plays)
+
+    def simulate_series_scalar(self, n_plays=1) -> float:
+        """Sums scalar draws. Avoids building an array when only a play or two is needed"""
+        return sum(self.rng.triangular(self.min_yards, self.exp_yards, self.max_yards) for _ in range(n_plays))
 
-        return series_yardage.sum()
+    def simulate_series_vec(self, n_plays=3) -> float:
+        """Draws the whole series in one call"""
+        return float(self.simulate_play_yards(n_plays).sum())
     
     def determine_opponent_position(self) -> int | float:
         """Gets the last play from the team's drive and determines where the opponent should start"""
+        # same rule as next_drive_start and _simulate_game_kernel. A drive with no plays turns the ball over where it started
+        if self.last_drive_is_empty():
+            return 100 - self.field_position
+
         last_play = self.get_last_play()
-        play_type = last_play.play_type
 
-        if last_play.points_from_play > 0:
+        if last_play['points_from_play'] > 0:
             return 25 # no variation on kickoffs for now
             
-        elif play_type == 'punt':
-            return last_play.opponent_position
+        elif last_play['play_type'] == PUNT:
+            return last_play['opponent_position']
 
         else:
             # turnover on downs. Flip the field from the last play
-            return 100 - (last_play.field_position + last_play.yards_gained)
+            return 100 - (last_play['field_position'] + last_play['yards_gained'])
         
 class FootballGame():
+    __slots__ = ('ball_first_team', 'ball_second_team', 'game_data', 'winner', 'loser')
+
     def __init__(self, ball_first_team:FootballTeam, ball_second_team:FootballTeam):
         self.ball_first_team = ball_first_team
         self.ball_second_team = ball_second_team
@@ -291,7 +677,10 @@ class FootballGame():
         self.loser = None
 
     def check_for_winner(self):
-        return all([self.ball_first_team.has_completed_a_possession, self.ball_second_team.has_completed_a_possession]) and self.ball_first_team.score != self.ball_second_team.score
+        # short-circuits on the first failed condition. This runs after every sudden death drive
+        return (self.ball_first_team.has_completed_a_possession 
+                and self.ball_second_team.has_completed_a_possession 
+                and self.ball_first_team.score != self.ball_second_team.score)
 
     def set_winning_team(self):
         # redundant check if there is truly a winner
@@ -312,42 +701,31 @@ class FootballGame():
         
     def get_last_play(self, ball_first_team:True):
         if ball_first_team:
-            return self.ball_first_team.get_drive_data()[-1].iloc[-1, :]
+            return self.ball_first_team.get_last_play()
         else:
-            return self.ball_second_team.get_drive_data()[-1].iloc[-1, :]
+            return self.ball_second_team.get_last_play()
 
     def update_game_data(self):
         """Updates game data dict fith high-level game information"""
 
         if self.winner is not None:
-            winner_df = pd.concat(self.winner.get_drive_data())
-            loser_df = pd.concat(self.loser.get_drive_data())
-
             self.game_data['winner'] = self.winner.name
             self.game_data['loser'] = self.loser.name
             self.game_data['winner_score'] = self.winner.score
-            self.game_data['winner_score'] = self.loser.score
+            self.game_data['loser_score'] = self.loser.score
             self.game_data['winner_had_ball_first'] = self.winner.had_ball_first
-            self.game_data['winning_team_number_of_drives'] = len(self.winner.get_drive_data())
-            self.game_data['losing_team_number_of_drives'] = len(self.loser.get_drive_data())
-            self.game_data['total_yards_winning_team'] = winner_df.sum().yards_gained
-            self.game_data['total_yards_losing_team'] = loser_df.sum().yards_gained
+            self.game_data['winning_team_number_of_drives'] = self.winner.get_number_of_drives()
+            self.game_data['losing_team_number_of_drives'] = self.loser.get_number_of_drives()
+            self.game_data['total_yards_winning_team'] = self.winner.get_total_yards()
+            self.game_data['total_yards_losing_team'] = self.loser.get_total_yards()
 
 
         
     def determine_drive_start(self, ball_first_team=True):
-        last_play = self.get_last_play(ball_first_team)
-        play_type = last_play.play_type
-
-        if last_play.points_from_play > 0:
-            return 25 # no variation on kickoffs for now
-            
-        elif play_type == 'punt':
-            return last_play.opponent_position
-
+        if ball_first_team:
+            return self.ball_first_team.determine_opponent_position()
         else:
-            # turnover on downs. Flip the field from the last play
-            return 100 - (last_play.field_position + last_play.yards_gained)
+            return self.ball_second_team.determine_opponent_position()
         
     def enable_sudden_death(self):
         self.ball_first_team.set_need_touchdown(False)
@@ -406,36 +784,239 @@ team2_params = {'name': 'kicking_team',
 
 class FootballSimulation():
     '''Wrapper to hold many simulations of games vs two teams'''
-    def __init__(self, team1_params: dict, team2_params: dict):
+    def __init__(self, team1_params: dict, team2_params: dict, seed: int | np.random.Generator = None):
         self.team1_params = team1_params
         self.team2_params = team2_params
+        self.rng = np.random.default_rng(seed)
 
         self.games: list = None
+        self._out: np.ndarray = None
 
-    def simulate_new_game(self):
-        team1 = FootballTeam(**self.team1_params)
-        team2 = FootballTeam(**self.team2_params)
+    def simulate_new_game(self, rng: np.random.Generator = None):
+        # both teams draw from the game's generator
+        rng = self.rng if rng is None else rng
+        team1 = FootballTeam(**self.team1_params, seed=rng)
+        team2 = FootballTeam(**self.team2_params, seed=rng)
     
         game = FootballGame(team1, team2)
     
         return game.simulate_game()
 
     def simulate_games(self, n_interations: int = 1000):
+        """Simulates n games. Large runs go to _simulate_games_kernel when numba is installed, 
+        or are spread across processes when it isn't.
+        Runs of fewer than PARALLEL_MIN_GAMES games keep every FootballGame in self.games. Larger runs only keep 
+        the summary rows, and self.games is None.
+        """
+        # drop the last run's results so they aren't copied to worker processes
+        self.games = None
+        self._out = None
+
+        if n_interations >= PARALLEL_MIN_GAMES and NUMBA_AVAILABLE:
+            return self._simulate_games_jit(n_interations)
+
+        # independent random stream for each game
+        rngs = self.rng.spawn(n_interations)
+
+        if n_interations >= PARALLEL_MIN_GAMES:
+            # workers send back summary rows only. Pickling whole games back to the parent is slower than playing them
+            with ProcessPoolExecutor() as executor:
+                records = list(executor.map(self._simulate_game_record, rngs, chunksize=100))
+
+            self._new_game_records(n_interations)
+            self._out[:] = records
+
+            return self
+
+        self.games = [self.simulate_new_game(rng) for rng in rngs]
+        self._new_game_records(n_interations)
+
+        for i, game in enumerate(self.games):
+            self._out[i] = self._game_record(game)
+
+        return self
+
+    @staticmethod
+    def _game_record(game: FootballGame) -> tuple:
+        return tuple(game.game_data[field] for field in GAME_FIELDS)
+
+    def _simulate_game_record(self, rng: np.random.Generator) -> tuple:
+        return self._game_record(self.simulate_new_game(rng))
+
+    def _new_game_records(self, n_games: int):
+        name_length = max(len(self.team1_params['name']), len(self.team2_params['name']), 1)
+        self._out = np.zeros(n_games, game_dtype(name_length))
 
-        self.games = [self.simulate_new_game() for i in range(n_interations)]
+    def _simulate_games_jit(self, n_interations: int = 1000):
+        team1 = FootballTeam(**self.team1_params)
+        team2 = FootballTeam(**self.team2_params)
+
+        team_params = np.array([[getattr(team, param) for param in TEAM_PARAMS] for team in (team1, team2)], dtype=float)
+
+        score = np.zeros((2, n_interations), dtype=np.int64)
+        drives = np.zeros((2, n_interations), dtype=np.int64)
+        yards = np.zeros((2, n_interations))
+        rngs = List(self.rng.spawn(min(n_interations, GAME_STREAMS)))
+
+        _simulate_games_kernel(rngs, team_params, FootballTeam._FG_LUT, score, drives, yards)
+
+        self.games = None
+        self._fill_game_records(team1.name, team2.name, score, drives, yards)
+
+        return self
+
+    def _fill_game_records(self, team1_name: str, team2_name: str, score: np.ndarray, drives: np.ndarray, yards: np.ndarray):
+        """Fills the game records from per-team arrays of shape (2, n_games). Row 0 is the ball first team"""
+        lanes = np.arange(score.shape[1])
+        first_team_won = score[0] > score[1]
+        winner = np.where(first_team_won, 0, 1)
+        loser = 1 - winner
+
+        self._new_game_records(lanes.size)
+        self._out['winner'] = np.where(first_team_won, team1_name, team2_name)
+        self._out['loser'] = np.where(first_team_won, team2_name, team1_name)
+        self._out['winner_score'] = score[winner, lanes]
+        self._out['loser_score'] = score[loser, lanes]
+        self._out['winner_had_ball_first'] = first_team_won
+        self._out['winning_team_number_of_drives'] = drives[winner, lanes]
+        self._out['losing_team_number_of_drives'] = drives[loser, lanes]
+        self._out['total_yards_winning_team'] = yards[winner, lanes]
+        self._out['total_yards_losing_team'] = yards[loser, lanes]
+
+    def simulate_games_vectorized(self, n_interations: int = 1000):
+        """Simulates every game at once. Each game is a lane in a set of state arrays, and every pass of the loop 
+        runs one play in each unfinished game. Follows the same rules as FootballGame.simulate_game.
+        """
+        team1 = FootballTeam(**self.team1_params)
+        team2 = FootballTeam(**self.team2_params)
+        teams = (team1, team2)
+
+        # team parameters, indexed by which team has the ball. 
+        # Everything stays in float32 and small ints, which is plenty for yardages and scores and moves half the bytes
+        min_yards = np.array([team.min_yards for team in teams], dtype=np.float32)
+        exp_yards = np.array([team.exp_yards for team in teams], dtype=np.float32)
+        max_yards = np.array([team.max_yards for team in teams], dtype=np.float32)
+        punt_distance = np.array([team.punt_distance for team in teams], dtype=np.float32)
+        punt_stdv = np.array([team.punt_stdv for team in teams], dtype=np.float32)
+        yard_thresh = np.array([team.fourth_down_yard_thresh for team in teams], dtype=np.float32)
+        position_thresh = np.array([team.fourth_down_position_thresh for team in teams], dtype=np.float32)
+        two_point_conversion_rate = np.array([team.two_point_conversion_rate for team in teams], dtype=np.float32)
+        go_for_two = np.array([team.go_for_two for team in teams], dtype=bool)
+
+        n = n_interations
+        lanes = np.arange(n)
+
+        # drive state
+        fp = np.full(n, 25.0, dtype=np.float32)
+        down = np.zeros(n, np.int8)
+        ytf = np.full(n, 10.0, dtype=np.float32)
+        need_td = np.full(n, team1.need_touchdown, dtype=bool)
+        need_score = np.full(n, team1.need_score, dtype=bool)
+
+        # game state. offense is 0 when the ball first team has the ball
+        offense = np.zeros(n, np.int8)
+        phase = np.zeros(n, np.int8) # 0 = team1 drive, 1 = team2 drive, 2 = sudden death
+        score = np.zeros((2, n), np.int8)
+        drives = np.zeros((2, n), np.int16)
+        yards = np.zeros((2, n), np.float32)
+        active = np.ones(n, bool)
+
+        # finished games are copied out here, then dropped from the state arrays once they make up a quarter of them.
+        # orig_idx maps each remaining lane back to its game
+        orig_idx = np.arange(n)
+        final_score = np.zeros((2, n), np.int8)
+        final_drives = np.zeros((2, n), np.int16)
+        final_yards = np.zeros((2, n), np.float32)
+
+        while active.any():
+            # a drive that starts in the endzone runs no plays, like simulate_drive
+            empty_drive = active & (fp >= 100)
+            playing = active & ~empty_drive
+            fourth = down == 3
+            fg_prob = FootballTeam._FG_LUT[np.clip(fp, 0, 100).astype(np.int32)]
+
+            # same choices as fourth_down_decision
+            go = ~fourth | need_td | ((fp > position_thresh[offense]) & (ytf < yard_thresh[offense]))
+            kick = ~go & (fg_prob > .55)
+            go |= ~kick & need_score
+            run = playing & go
+            punt = playing & ~go & ~kick
+            kick &= playing
+
+            # run plays
+            gained = self.rng.triangular(min_yards[offense], exp_yards[offense], max_yards[offense]).astype(np.float32, copy=False)
+            play_start = fp
+            fp = np.where(run, fp + gained, fp)
+            touchdown = run & (fp >= 100)
+            conversion = np.where(go_for_two[offense], np.int8(2) * (self.rng.random(lanes.size, dtype=np.float32) <= two_point_conversion_rate[offense]), 1)
+            ytf = np.where(run & ~touchdown, ytf - gained, ytf)
+            new_series = run & ~touchdown & (ytf <= 0)
+
+            # field goals and punts
+            made_kick = kick & (self.rng.random(lanes.size, dtype=np.float32) <= fg_prob)
+            punt_landing_spot = fp + punt_distance[offense] + punt_stdv[offense] * self.rng.standard_normal(lanes.size, dtype=np.float32)
+            opponent_position = np.where(punt_landing_spot <= 100, 100 - punt_landing_spot, 25)
+
+            play_type = np.full(lanes.size, RUN_PLAY, np.int8)
+            play_type[punt] = PUNT
+            play_type[kick] = FIELD_GOAL
+            points = np.where(touchdown, 6 + conversion, 0)
+            points[made_kick] = 3
+            play_yards = np.where(run, gained, 0)
+            play_yards[kick] = -5
+            score[offense, lanes] += points
+            yards[offense, lanes] += play_yards
+
+            down = np.where(new_series, 0, down + playing)
+            ytf[new_series] = 10
+
+            drive_over = (playing & ((down > 3) | touchdown)) | empty_drive
+            if not drive_over.any():
+                continue
+
+            next_start = next_drive_start(play_type, points, play_start, play_yards, opponent_position, empty_drive)
+
+            drives[offense, lanes] += drive_over
+            game_over = drive_over & (phase >= 1) & (score[0] != score[1])
+
+            # second team knows what it needs on its first drive. Nobody needs anything special in sudden death
+            opening_drive = drive_over & (phase == 0)
+            need_td = np.where(opening_drive, team2.need_touchdown | (score[0] == 7), need_td & ~drive_over)
+            need_score = np.where(opening_drive, team2.need_score | (score[0] == 3), need_score & ~drive_over)
+
+            phase = np.where(drive_over, np.minimum(phase + 1, 2), phase)
+            offense = np.where(drive_over, 1 - offense, offense)
+            fp = np.where(drive_over, next_start, fp)
+            down[drive_over] = 0
+            ytf[drive_over] = 10
+            active &= ~game_over
+
+            games = orig_idx[game_over]
+            final_score[:, games] = score[:, game_over]
+            final_drives[:, games] = drives[:, game_over]
+            final_yards[:, games] = yards[:, game_over]
+
+            if (~active).mean() > .25:
+                keep = np.nonzero(active)[0]
+                fp, down, ytf, need_td, need_score = fp[keep], down[keep], ytf[keep], need_td[keep], need_score[keep]
+                offense, phase, active, orig_idx = offense[keep], phase[keep], active[keep], orig_idx[keep]
+                score, drives, yards = score[:, keep], drives[:, keep], yards[:, keep]
+                lanes = np.arange(keep.size)
+
+        self.games = None
+        self._fill_game_records(team1.name, team2.name, final_score, final_drives, final_yards)
 
         return self
 
     def summarize_df(self) -> pd.DataFrame:
-        return pd.DataFrame([game.game_data for game in self.games])
+        return pd.DataFrame.from_records(self._out)
 
              
 if __name__ == '__main__':
     from pprint import pprint
 
-    np.random.seed(123)
     # test team class
-    team = FootballTeam('team1', exp_yards=6, min_yards=-15, max_yards=25)
+    team = FootballTeam('team1', exp_yards=6, min_yards=-15, max_yards=25, seed=123)
 
     n_drives = 10000
     for i in range(n_drives):
@@ -470,7 +1051,18 @@ if __name__ == '__main__':
 
     # test smualtion wrapper class
     print('Testing FootballSimulation Wrapper...')
-    test = FootballSimulation(team1_params, team2_params)
+    test = FootballSimulation(team1_params, team2_params, seed=123)
     test.simulate_games(5)
 
+    pprint(test.summarize_df())
+
+    # large enough to run on _simulate_games_kernel, or across processes without numba
+    print(f'Testing FootballSimulation Wrapper With {PARALLEL_MIN_GAMES} Games...')
+    test.simulate_games(PARALLEL_MIN_GAMES)
+
+    pprint(test.summarize_df().describe())
+
+    print('Testing Vectorized Simulation...')
+    test.simulate_games_vectorized(5)
+
     pprint(test.summarize_df())
\ No newline at end of file